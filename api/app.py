@@ -1,10 +1,18 @@
 import pandas as pd
 import joblib
 import os
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
 import sys
 
+from api.formats import (
+    ARROW, JSON, MSGPACK, SchemaError, UnsupportedFormatError,
+    decode_batch, encode_predictions, resolve_format
+)
+from api.shadow import ShadowScorer, load_candidate
+from api.explain import build_explainer
+
 # 1. Define Request Data Format (based on request_schema.json)
 class SleepInput(BaseModel):
     gender: str
@@ -19,20 +27,64 @@ class SleepInput(BaseModel):
     heart_rate: int
     daily_steps: int
 
+# Column-wise schema used to validate Arrow / MessagePack batches (field -> str / int / float)
+SLEEP_INPUT_SCHEMA = dict(SleepInput.__annotations__)
+
 # 2. Initialize FastAPI Application
 app = FastAPI(title="Sleep Disorder Prediction API")
 # Global variables for loading the model
 model_pipeline = None
 label_encoder = None
+# Optional candidate model scored off the hot path (see api/shadow.py)
+shadow_scorer = None
+# Precomputed attribution internals for ?explain=true (see api/explain.py)
+explainer = None
 
 # [IMPORTANT: Unify Model Path Variable Name]
 # SageMaker mounts the model at MODEL_DIR (i.e., /opt/ml/model)
 MODEL_DIR = os.getenv("MODEL_DIR", ".") 
 
+# Shadow mode: directory or model.tar.gz of the candidate; disabled when unset
+SHADOW_MODEL_DIR = os.getenv("SHADOW_MODEL_DIR")
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "100"))
+
+@app.on_event("startup")
+def load_shadow_model(n_slots=1):
+    global shadow_scorer
+
+    # Prefork mode (api/serve.py) starts one scorer in the parent that all workers share,
+    # with one request-counter slot per worker
+    if shadow_scorer is not None or not SHADOW_MODEL_DIR:
+        return
+    try:
+        candidate_pipeline, candidate_encoder = load_candidate(SHADOW_MODEL_DIR)
+        shadow_scorer = ShadowScorer(
+            candidate_pipeline, candidate_encoder,
+            sample_rate=SHADOW_SAMPLE_RATE, queue_size=SHADOW_QUEUE_SIZE, n_slots=n_slots
+        )
+        shadow_scorer.start()
+        print(f"✅ Shadow model loaded from {SHADOW_MODEL_DIR} (sample rate {SHADOW_SAMPLE_RATE})")
+    except Exception as e:
+        # The candidate must never take the primary endpoint down
+        shadow_scorer = None
+        print(f"❌ Shadow model loading failed ({SHADOW_MODEL_DIR}): {e}")
+
+@app.on_event("shutdown")
+def stop_shadow_model():
+    if shadow_scorer is not None:
+        shadow_scorer.stop()
+
 @app.on_event("startup")
 def load_artifacts():
     # ⚠️ Fix 1: global declaration must be at the beginning of the function
     global model_pipeline, label_encoder 
+
+    # Prefork mode (api/serve.py) loads the model once in the parent before forking;
+    # reloading here would give every worker its own private copy
+    if model_pipeline is not None and label_encoder is not None:
+        print("✅ Model already loaded (preloaded before fork), skipping reload")
+        return
     
     # Correction: Use SageMaker standard path directly (model files are after tarball decompression)
     MODEL_FILENAME = "model.joblib"
@@ -74,6 +126,17 @@ def load_artifacts():
     print("⚠️ Warning: Model failed to load, but the server will start and respond to /ping request (returning 500).")
     return
 
+@app.on_event("startup")
+def load_explainer():
+    # Runs after load_artifacts (startup handlers run in registration order)
+    global explainer
+
+    if explainer is not None or model_pipeline is None:
+        return
+    explainer = build_explainer(model_pipeline)
+    if explainer is not None:
+        print(f"✅ Explainer ready ({explainer.method}) for fields: {explainer.field_names}")
+
 @app.get("/ping")
 def health_check():
     """Health check interface required by AWS SageMaker"""
@@ -82,25 +145,78 @@ def health_check():
         return {"status": "Healthy"}
     raise HTTPException(status_code=500, detail="Model not loaded")
 
-@app.post("/invocations")
-async def predict(input_data: SleepInput):
-    """Inference interface required by AWS SageMaker (path must be /invocations)"""
+@app.get("/shadow")
+def shadow_stats():
+    """Agreement rate and latency of the shadow candidate model"""
+    if shadow_scorer is None:
+        raise HTTPException(status_code=404, detail="Shadow mode is not enabled")
+    return shadow_scorer.stats()
+
+@app.post(
+    "/invocations",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON: {"schema": SleepInput.schema()},
+                ARROW: {"schema": {"type": "string", "format": "binary"}},
+                MSGPACK: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+async def predict(request: Request, explain: bool = False):
+    """
+    Inference interface required by AWS SageMaker (path must be /invocations).
+    JSON (default): a single SleepInput record -> {"prediction": label}.
+    Arrow IPC / MessagePack: a batch of SleepInput columns -> a "prediction" column in the same format.
+    With ?explain=true, per-field attributions for the predicted class are added
+    ("explanation" in JSON, "base_value" / "attribution_<field>" columns in binary formats).
+    """
     # Ensure model_pipeline and label_encoder are correctly referenced
     if not model_pipeline or not label_encoder:
         raise HTTPException(status_code=500, detail="Model not initialized")
-    
+
+    # 1. Negotiate the format from Content-Type and convert the body to a DataFrame
     try:
-        # 1. Convert to DataFrame (This is the input format expected by the Pipeline)
-        data_dict = input_data.dict()
-        df = pd.DataFrame([data_dict])
-        
-        # 2. Perform prediction
-        pred_encoded = model_pipeline.predict(df)
+        fmt = resolve_format(request.headers.get("content-type"))
+    except UnsupportedFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    body = await request.body()
+    if fmt == JSON:
+        try:
+            input_data = SleepInput.model_validate_json(body)
+        except ValidationError as e:
+            # Same structured 422 as FastAPI's typed body parameter (loc prefixed with "body")
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+        df = pd.DataFrame([input_data.dict()])
+    else:
+        try:
+            df = decode_batch(body, fmt, SLEEP_INPUT_SCHEMA)
+        except SchemaError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        # 2. Perform prediction (the explainer predicts and attributes in the same pass)
+        explanation = None
+        if explain and explainer is not None:
+            pred_encoded, base_values, attributions = explainer.predict_and_explain(df)
+            explanation = {"base_value": base_values}
+            for i, field in enumerate(explainer.field_names):
+                explanation[f"attribution_{field}"] = attributions[:, i]
+        else:
+            pred_encoded = model_pipeline.predict(df)
+            if explain:
+                # No fast path for this model: binary formats get null columns, like "explanation": null
+                explanation = {"base_value": [None] * len(df)}
+                for field in SLEEP_INPUT_SCHEMA:
+                    explanation[f"attribution_{field}"] = [None] * len(df)
         
         # 3. Decode result (0 -> Insomnia)
-        pred_label = label_encoder.inverse_transform(pred_encoded)[0]
-        
-        return {"prediction": pred_label}
+        pred_labels = label_encoder.inverse_transform(pred_encoded)
         
     except Exception as e:
         # Print detailed Python error information for easy debugging
@@ -108,4 +224,22 @@ async def predict(input_data: SleepInput):
         traceback.print_exc()
         raise HTTPException(status_code=400, detail=str(e))
 
+    # 4. Copy a sample of traffic to the shadow candidate (non-blocking, dropped when busy)
+    if shadow_scorer is not None:
+        shadow_scorer.submit(df, pred_labels)
+
+    # 5. Respond in the request's format (JSON stays a single-record response for the frontend)
+    if fmt == JSON:
+        response = {"prediction": pred_labels[0]}
+        if explain:
+            response["explanation"] = None if explainer is None else {
+                "method": explainer.method,
+                "base_value": float(explanation["base_value"][0]),
+                "attributions": {
+                    field: float(explanation[f"attribution_{field}"][0]) for field in explainer.field_names
+                }
+            }
+        return response
+    return Response(content=encode_predictions(pred_labels, fmt, explanation), media_type=fmt)
+
 # Local testing startup command: uvicorn api.app:app --reload
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Binary request/response formats for the /invocations endpoint.
+JSON (one record per request) stays the default. High-volume callers can instead send a
+whole batch column-wise as an Arrow IPC stream or a MessagePack map of columns, which is
+validated per column and turned into a DataFrame without building a Python object per row.
+"""
+import io
+import numpy as np
+import pandas as pd
+
+# Optional dependencies: the binary formats are only offered when the library is installed
+try:
+    import pyarrow as pa
+except ImportError as e:
+    # Also raised when the installed pyarrow is incompatible with numpy, so say why
+    print(f"⚠️ Arrow IPC format disabled: {e}")
+    pa = None
+
+try:
+    import msgpack
+except ImportError as e:
+    print(f"⚠️ MessagePack format disabled: {e}")
+    msgpack = None
+
+# Target dtypes per SleepInput field type, matching what the JSON path produces
+_DTYPES = {str: str, int: np.int64, float: np.float64}
+_INT64 = np.iinfo(np.int64)
+
+JSON = "application/json"
+ARROW = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+# Content types accepted for each binary format (anything else is treated as JSON)
+_CONTENT_TYPES = {
+    ARROW: ARROW,
+    "application/vnd.apache.arrow.file": ARROW,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+}
+
+class UnsupportedFormatError(ValueError):
+    """Raised when a binary format is requested but its library is not installed."""
+
+class SchemaError(ValueError):
+    """Raised when a batch does not match the SleepInput schema."""
+
+def resolve_format(content_type):
+    """
+    Maps a Content-Type header to one of JSON / ARROW / MSGPACK.
+    Missing or unknown content types fall back to JSON so existing callers keep working.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    fmt = _CONTENT_TYPES.get(media_type, JSON)
+
+    if fmt == ARROW and pa is None:
+        raise UnsupportedFormatError("Arrow IPC requests require 'pyarrow' to be installed")
+    if fmt == MSGPACK and msgpack is None:
+        raise UnsupportedFormatError("MessagePack requests require 'msgpack' to be installed")
+    return fmt
+
+def _check_arrow_column(name, column, expected):
+    """Validates one Arrow column against the expected Python type."""
+    arrow_type = column.type
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+
+    if expected is str:
+        valid = pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+    elif expected is int:
+        valid = pa.types.is_integer(arrow_type)
+    else:
+        valid = pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)
+
+    if not valid:
+        raise SchemaError(f"Column '{name}' has type {column.type}, expected {expected.__name__}")
+    if column.null_count:
+        raise SchemaError(f"Column '{name}' contains {column.null_count} null value(s)")
+
+def _check_series(name, series, expected):
+    """
+    Validates one decoded MessagePack column (as an object Series) against the expected
+    Python type and returns it cast to the dtype the JSON path would produce.
+    """
+    # infer_dtype scans the raw values in C; skipna=False makes nulls fail the check
+    inferred = pd.api.types.infer_dtype(series, skipna=False)
+
+    if expected is str:
+        valid = inferred == "string"
+    elif expected is int:
+        valid = inferred == "integer"
+    else:
+        valid = inferred in ("integer", "floating", "mixed-integer-float")
+
+    if not valid:
+        raise SchemaError(f"Column '{name}' has {inferred} values, expected {expected.__name__}")
+    # MessagePack carries unsigned 64-bit ints that int64 cannot hold (astype would wrap them)
+    if expected is int and (series.min() < _INT64.min or series.max() > _INT64.max):
+        raise SchemaError(f"Column '{name}' has values outside the int64 range")
+    return series.astype(_DTYPES[expected])
+
+def _decode_arrow(body, schema):
+    # A stream whose schema parses can still be truncated or corrupt further on, so the
+    # record batches are read inside the same guard as the header
+    buffer = pa.py_buffer(body)
+    try:
+        table = pa.ipc.open_stream(buffer).read_all()
+    except pa.ArrowException:
+        # Fall back to the random-access file format
+        try:
+            table = pa.ipc.open_file(buffer).read_all()
+        except pa.ArrowException as e:
+            raise SchemaError(f"Body is not a valid Arrow IPC stream or file: {e}") from e
+
+    missing = [name for name in schema if name not in table.column_names]
+    if missing:
+        raise SchemaError(f"Missing column(s): {missing}")
+
+    table = table.select(list(schema))
+    for name, expected in schema.items():
+        _check_arrow_column(name, table.column(name), expected)
+    return table.to_pandas()
+
+def _decode_msgpack(body, schema):
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise SchemaError(f"Body is not valid MessagePack: {e}") from e
+
+    if not isinstance(payload, dict):
+        raise SchemaError("MessagePack body must be a map of column name -> list of values")
+
+    missing = [name for name in schema if name not in payload]
+    if missing:
+        raise SchemaError(f"Missing column(s): {missing}")
+
+    for name in schema:
+        if not isinstance(payload[name], list):
+            raise SchemaError(f"Column '{name}' must be a list of values")
+
+    lengths = {len(payload[name]) for name in schema}
+    if len(lengths) > 1:
+        raise SchemaError(f"Columns have different lengths: {sorted(lengths)}")
+    if lengths == {0}:
+        raise SchemaError("Batch contains no rows")
+
+    columns = {}
+    for name, expected in schema.items():
+        series = pd.Series(payload[name], name=name, dtype=object)
+        columns[name] = _check_series(name, series, expected)
+    return pd.DataFrame(columns)
+
+def decode_batch(body, fmt, schema):
+    """
+    Decodes an Arrow or MessagePack body into a model-ready DataFrame.
+    `schema` maps each SleepInput field to its Python type (str / int / float);
+    extra columns are ignored, missing or mistyped columns raise SchemaError.
+    """
+    if fmt == ARROW:
+        df = _decode_arrow(body, schema)
+    elif fmt == MSGPACK:
+        df = _decode_msgpack(body, schema)
+    else:
+        raise ValueError(f"decode_batch does not handle format: {fmt}")
+
+    if df.empty:
+        raise SchemaError("Batch contains no rows")
+    return df
+
+def encode_predictions(labels, fmt, extra_columns=None):
+    """
+    Serializes predicted labels in the same binary format as the request.
+    `extra_columns` optionally maps column name -> numeric array (e.g. attributions);
+    None entries are encoded as nulls.
+    """
+    labels = [str(label) for label in labels]
+    extra_columns = extra_columns or {}
+    if fmt == ARROW:
+        columns = {"prediction": pa.array(labels, type=pa.string())}
+        columns.update({
+            name: pa.array(list(values), type=pa.float64()) for name, values in extra_columns.items()
+        })
+        table = pa.table(columns)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    if fmt == MSGPACK:
+        payload = {"prediction": labels}
+        payload.update({
+            name: [None if v is None else float(v) for v in values] for name, values in extra_columns.items()
+        })
+        return msgpack.packb(payload, use_bin_type=True)
+    raise ValueError(f"encode_predictions does not handle format: {fmt}")
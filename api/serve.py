@@ -0,0 +1,254 @@
+"""
+Prefork serving mode for the FastAPI backend.
+The model bundle is loaded once in a parent process, which then forks N uvicorn workers
+sharing one listening socket. The model's arrays live in pages inherited copy-on-write,
+so workers share them instead of each joblib.load-ing a private copy. The optional shadow
+candidate (api/shadow.py) is also loaded once, and its single scorer process is fed by every
+worker. The parent periodically reports per-worker memory and aggregate throughput so
+instances can be sized.
+
+Usage: python -m api.serve --host 0.0.0.0 --port 8000 [--workers N]
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+# Seconds between memory / throughput reports from the parent
+REPORT_INTERVAL = 30
+
+# Delay before respawning a crashed worker, doubled for each crash within RESPAWN_BACKOFF_MAX
+# seconds of its start so a worker failing on startup does not respawn in a tight loop
+RESPAWN_BACKOFF = 1.0
+RESPAWN_BACKOFF_MAX = 30.0
+
+def default_worker_count():
+    """
+    Worker count from the CPUs this process may run on (respects container CPU affinity),
+    overridable with the WEB_CONCURRENCY environment variable.
+    """
+    env_workers = os.getenv("WEB_CONCURRENCY")
+    if env_workers:
+        return max(1, int(env_workers))
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+def read_memory_mb(pid):
+    """
+    Returns {"rss": .., "pss": .., "shared": ..} in MB for a process, read from /proc.
+    PSS splits shared pages between the processes mapping them, so summing PSS across
+    workers gives the real footprint. Values are None where /proc is unavailable.
+    """
+    memory = {"rss": None, "pss": None, "shared": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+        memory["rss"] = fields.get("Rss", 0) / 1024
+        memory["pss"] = fields.get("Pss", 0) / 1024
+        memory["shared"] = (fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024
+    except OSError:
+        pass
+    return memory
+
+class CountingApp:
+    """
+    ASGI wrapper that counts HTTP requests into one slot of a shared counter array,
+    so the parent can compute aggregate throughput across workers.
+    """
+    def __init__(self, app, counters, slot):
+        self.app = app
+        self.counters = counters
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            # Each slot is written by a single worker process, so no lock is needed
+            self.counters[self.slot] += 1
+        await self.app(scope, receive, send)
+
+def _bind_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def _run_worker(app, sock, counters, slot, args):
+    """Child process body: serve on the inherited socket until told to stop."""
+    import uvicorn
+
+    config = uvicorn.Config(CountingApp(app, counters, slot), log_level=args.log_level)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+def _report(workers, counters, last_total, last_time):
+    now = time.monotonic()
+    total = sum(counters)
+    throughput = (total - last_total) / (now - last_time) if now > last_time else 0.0
+
+    pss_total = 0.0
+    for slot, pid in sorted(workers.items()):
+        memory = read_memory_mb(pid)
+        if memory["rss"] is None:
+            print(f"[prefork] worker {slot} (pid {pid}): requests={counters[slot]} memory=unavailable", flush=True)
+            continue
+        pss_total += memory["pss"]
+        print(
+            f"[prefork] worker {slot} (pid {pid}): requests={counters[slot]} "
+            f"rss={memory['rss']:.1f}MB pss={memory['pss']:.1f}MB shared={memory['shared']:.1f}MB",
+            flush=True
+        )
+    print(
+        f"[prefork] {len(workers)} workers: total_requests={total} "
+        f"throughput={throughput:.1f} req/s total_pss={pss_total:.1f}MB",
+        flush=True
+    )
+    return total, now
+
+def serve(args):
+    import api.app as app_module
+
+    # 1. Load the model bundle (and shadow candidate) once in the parent. The shadow scorer
+    # process starts here, before any worker exists, and its queue/counters are inherited
+    app_module.load_artifacts()
+    app_module.load_explainer()
+    app_module.load_shadow_model(n_slots=args.workers)
+    parent_memory = read_memory_mb(os.getpid())
+    if parent_memory["rss"] is not None:
+        print(f"[prefork] Parent {os.getpid()} loaded model: rss={parent_memory['rss']:.1f}MB", flush=True)
+
+    # Move everything allocated so far out of the GC's reach so collections in the
+    # workers do not write to (and thereby un-share) the inherited model pages
+    gc.freeze()
+
+    sock = _bind_socket(args.host, args.port)
+    counters = multiprocessing.RawArray("q", args.workers)
+    workers = {}
+    started = {}
+    backoff = {}
+    pending = {}
+    stopping = False
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid == 0:
+            # Child: restore default signal handling, uvicorn installs its own
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                if app_module.shadow_scorer is not None:
+                    app_module.shadow_scorer.use_slot(slot)
+                _run_worker(app_module.app, sock, counters, slot, args)
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except BaseException:
+                # Surface the crash to the parent's respawn log instead of exiting cleanly
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(exit_code)
+        workers[slot] = pid
+        started[slot] = time.monotonic()
+        print(f"[prefork] Started worker {slot} (pid {pid})", flush=True)
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        pending.clear()
+        for pid in workers.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # 2. Fork the workers
+    print(f"[prefork] Serving on {args.host}:{args.port} with {args.workers} workers", flush=True)
+    for slot in range(args.workers):
+        spawn(slot)
+
+    # 3. Supervise: respawn crashed workers and report memory / throughput.
+    # Only worker PIDs are waited on: the shadow scorer is also a child of this process,
+    # and reaping it here would hide its exit from multiprocessing
+    scorer = app_module.shadow_scorer
+    last_total, last_time = 0, time.monotonic()
+    next_report = last_time + args.report_interval
+    while workers or pending:
+        for slot, pid in list(workers.items()):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+                exit_code = os.waitstatus_to_exitcode(status) if done else None
+            except ChildProcessError:
+                done, exit_code = pid, "unknown"
+            if not done:
+                continue
+            del workers[slot]
+            if stopping:
+                continue
+            now = time.monotonic()
+            if slot in backoff and now - started[slot] < RESPAWN_BACKOFF_MAX:
+                backoff[slot] = min(backoff[slot] * 2, RESPAWN_BACKOFF_MAX)
+            else:
+                backoff[slot] = RESPAWN_BACKOFF
+            pending[slot] = now + backoff[slot]
+            print(
+                f"[prefork] Worker {slot} (pid {pid}) exited with code {exit_code}, "
+                f"respawning in {backoff[slot]:.0f}s",
+                flush=True
+            )
+
+        for slot, respawn_at in list(pending.items()):
+            if not stopping and time.monotonic() >= respawn_at:
+                del pending[slot]
+                spawn(slot)
+
+        if scorer is not None:
+            scorer_exit = scorer.check_exited()
+            if scorer_exit is not None:
+                print(
+                    f"[prefork] Shadow scorer exited with code {scorer_exit}, shadow scoring stopped",
+                    flush=True
+                )
+                scorer = None
+
+        if not stopping and time.monotonic() >= next_report:
+            last_total, last_time = _report(workers, counters, last_total, last_time)
+            next_report = last_time + args.report_interval
+        time.sleep(0.5)
+
+    sock.close()
+    app_module.stop_shadow_model()
+    print("[prefork] All workers stopped", flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefork FastAPI server with a shared, preloaded model")
+    parser.add_argument("--host", type=str, default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=default_worker_count())
+    parser.add_argument("--report_interval", type=float, default=REPORT_INTERVAL)
+    parser.add_argument("--log_level", type=str, default="info")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        sys.exit("❌ Prefork mode requires os.fork (Linux/macOS)")
+    serve(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Shadow scoring of a candidate model for the /invocations endpoint.
+A sampled fraction of live requests is copied onto a bounded queue and scored by a
+separate low-priority process, so the candidate sees real traffic without competing with
+the primary response for the GIL or the CPU. When the queue is full the copy is dropped
+instead of blocking. Counters live in shared memory, so in prefork mode (api/serve.py)
+every worker feeds the same scorer and /shadow reports aggregate stats.
+The request path never takes a lock the scorer can hold: a preempted low-priority scorer
+must not stall a worker's event loop. Every counter has a single writer (the scorer, or
+one worker's slot), and the queue's cross-process write lock is only taken by the
+queue's background feeder thread.
+"""
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import tarfile
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+# Number of recent candidate latencies kept for percentile reporting
+LATENCY_WINDOW = 1000
+
+# Niceness of the scorer process: the kernel favours the serving process whenever both are runnable
+SHADOW_NICENESS = 19
+
+# Counters written on the request path, one row per worker slot
+_SUBMIT_COUNTERS = ("sampled", "dropped")
+# Counters written only by the scorer process ('processed' counts queue items, scored counts rows)
+_SCORER_COUNTERS = ("scored", "agreed", "errors", "processed")
+_SLOT = {name: i for i, name in enumerate(_SUBMIT_COUNTERS)}
+_SCORER_SLOT = {name: i for i, name in enumerate(_SCORER_COUNTERS)}
+
+def _mp_context():
+    """Fork shares the already-loaded candidate copy-on-write; spawn is the portable fallback."""
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+def _score_loop(work_queue, model_pipeline, label_encoder, counters, latencies, latency_count):
+    """Scorer process body: score queued requests until the None sentinel arrives."""
+    # Ctrl-C goes to the whole process group; shutdown is driven by the sentinel instead
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        os.nice(SHADOW_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+    # This process is the only writer of counters / latencies, so no lock is needed
+    while True:
+        item = work_queue.get()
+        if item is None:
+            break
+        try:
+            df, primary_labels = item
+            start = time.perf_counter()
+            pred_encoded = model_pipeline.predict(df)
+            candidate_labels = label_encoder.inverse_transform(pred_encoded)
+            latency_ms = (time.perf_counter() - start) * 1000
+
+            agreed = int(np.sum(np.asarray(candidate_labels) == primary_labels))
+            counters[_SCORER_SLOT["scored"]] += len(primary_labels)
+            counters[_SCORER_SLOT["agreed"]] += agreed
+            latencies[latency_count.value % LATENCY_WINDOW] = latency_ms
+            latency_count.value += 1
+        except Exception as e:
+            print(f"⚠️ Shadow scoring failed: {e}")
+            counters[_SCORER_SLOT["errors"]] += 1
+        finally:
+            counters[_SCORER_SLOT["processed"]] += 1
+
+def _extract_tarball(path, extract_dir):
+    """Extracts a model.tar.gz, refusing members that would land outside extract_dir."""
+    with tarfile.open(path, "r:gz") as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(extract_dir, filter="data")
+            return
+        # Pythons without extraction filters: check member paths by hand
+        root = os.path.realpath(extract_dir)
+        for member in tar.getmembers():
+            target = os.path.realpath(os.path.join(extract_dir, member.name))
+            if os.path.commonpath([root, target]) != root or member.issym() or member.islnk():
+                raise ValueError(f"Unsafe path in model archive: {member.name}")
+        tar.extractall(extract_dir)
+
+def load_candidate(path):
+    """
+    Loads (model_pipeline, label_encoder) from a model directory or a SageMaker model.tar.gz.
+    Tarballs are extracted into a temporary directory that is removed once loaded.
+    """
+    if path.endswith(".tar.gz"):
+        with tempfile.TemporaryDirectory(prefix="shadow_model_") as extract_dir:
+            _extract_tarball(path, extract_dir)
+            return load_candidate(extract_dir)
+
+    model_pipeline = joblib.load(os.path.join(path, "model.joblib"))
+    label_encoder = joblib.load(os.path.join(path, "label_encoder.joblib"))
+    return model_pipeline, label_encoder
+
+class ShadowScorer:
+    """
+    Scores sampled requests with a candidate model in a background process and
+    records agreement with the primary model and candidate latency.
+    """
+    def __init__(self, model_pipeline, label_encoder, sample_rate=0.1, queue_size=100, n_slots=1):
+        self.model_pipeline = model_pipeline
+        self.label_encoder = label_encoder
+        self.sample_rate = sample_rate
+        ctx = _mp_context()
+        self._ctx = ctx
+        self._queue = ctx.Queue(maxsize=queue_size)
+        # Lock-free shared memory: each slot / array has exactly one writing process
+        self._submit_counters = ctx.RawArray("q", n_slots * len(_SUBMIT_COUNTERS))
+        self._slot = 0
+        self._counters = ctx.RawArray("q", len(_SCORER_COUNTERS))
+        self._latencies = ctx.RawArray("d", LATENCY_WINDOW)
+        self._latency_count = ctx.RawValue("q", 0)
+        # Set by the owner once the scorer has died, so workers stop enqueuing copies
+        self._dead = ctx.RawValue("b", 0)
+        self._process = None
+        self._owner_pid = None
+
+    def use_slot(self, slot):
+        """
+        Selects the row of request-path counters this process writes.
+        Prefork workers call it after fork so no two processes share a slot.
+        """
+        if not 0 <= slot < len(self._submit_counters) // len(_SUBMIT_COUNTERS):
+            raise ValueError(f"Shadow counter slot {slot} out of range")
+        self._slot = slot
+
+    def start(self):
+        """Starts the scorer process (daemon, so it never outlives the server)."""
+        if self._process is None:
+            self._process = self._ctx.Process(
+                target=_score_loop,
+                args=(self._queue, self.model_pipeline, self.label_encoder,
+                      self._counters, self._latencies, self._latency_count),
+                name="shadow-scorer", daemon=True
+            )
+            self._process.start()
+            self._owner_pid = os.getpid()
+
+    def stop(self, timeout=5.0):
+        """
+        Signals the scorer to finish the queued items and waits for it.
+        Only the process that started the scorer may stop it (prefork workers share it).
+        """
+        if self._process is None or os.getpid() != self._owner_pid:
+            return
+        if self._process.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+        self._process.join(timeout=timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+
+    def check_exited(self):
+        """
+        Returns the scorer's exit code once it has died (and marks it dead so every worker
+        stops enqueuing copies), otherwise None. Only the process that started it can tell.
+        """
+        if self._process is None or os.getpid() != self._owner_pid or self._process.is_alive():
+            return None
+        self._dead.value = 1
+        return self._process.exitcode
+
+    def submit(self, df, primary_labels):
+        """
+        Called on the request path: samples the request and enqueues it without blocking.
+        put_nowait only tries the queue's size semaphore; pickling and the pipe write
+        happen on the queue's feeder thread.
+        """
+        if self._dead.value or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        try:
+            self._queue.put_nowait((df, np.asarray(primary_labels)))
+            self._increment("sampled")
+        except queue.Full:
+            self._increment("dropped")
+
+    def _increment(self, key):
+        # Only this process writes its slot (and only from the event loop), so no lock is needed
+        self._submit_counters[self._slot * len(_SUBMIT_COUNTERS) + _SLOT[key]] += 1
+
+    def _submit_counts(self):
+        width = len(_SUBMIT_COUNTERS)
+        rows = self._submit_counters[:]
+        return {name: sum(rows[i::width]) for i, name in enumerate(_SUBMIT_COUNTERS)}
+
+    def wait_idle(self, timeout=30.0):
+        """
+        Blocks until every enqueued request has been scored (used by tests and benchmarks).
+        Returns False if the scorer has not caught up within the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while self._counters[_SCORER_SLOT["processed"]] < self._submit_counts()["sampled"]:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self):
+        """
+        Returns counters, agreement rate and candidate latency percentiles.
+        Counters are read without a lock, so a snapshot taken mid-update may be off by one request.
+        """
+        counts = {**self._submit_counts(), **dict(zip(_SCORER_COUNTERS, self._counters[:]))}
+        counts.pop("processed")
+        n_latencies = min(self._latency_count.value, LATENCY_WINDOW)
+        latencies = self._latencies[:n_latencies]
+
+        try:
+            queue_depth = self._queue.qsize()
+        except NotImplementedError:
+            # qsize() is unavailable on macOS
+            queue_depth = None
+
+        stats = {
+            **counts,
+            "sample_rate": self.sample_rate,
+            "scorer_alive": not self._dead.value,
+            "queue_depth": queue_depth,
+            "agreement_rate": counts["agreed"] / counts["scored"] if counts["scored"] else None,
+        }
+        if latencies:
+            p50, p95 = np.percentile(latencies, [50, 95])
+            stats["latency_ms"] = {"p50": float(p50), "p95": float(p95), "max": float(max(latencies))}
+        else:
+            stats["latency_ms"] = None
+        return stats
@@ -0,0 +1,119 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.svm import SVC
+
+# Allow running from the repository root: python scripts/benchmark_explanations.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.explain import build_explainer
+
+# --- Configuration area ---
+CAT_COLS = ['gender', 'occupation', 'bmi_category', 'blood_pressure']
+NUM_COLS = ['age', 'sleep_duration', 'quality_of_sleep', 'physical_activity_level',
+            'stress_level', 'heart_rate', 'daily_steps']
+
+def make_data(n_rows, seed=42):
+    """Synthetic data shaped like the cleaned Kaggle dataset (374 rows upstream)."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'gender': rng.choice(['Male', 'Female'], n_rows),
+        'age': rng.integers(27, 60, n_rows),
+        'occupation': rng.choice(['Nurse', 'Doctor', 'Engineer', 'Lawyer', 'Teacher',
+                                  'Accountant', 'Salesperson', 'Scientist'], n_rows),
+        'sleep_duration': rng.normal(7.1, 0.8, n_rows).round(1),
+        'quality_of_sleep': rng.integers(4, 10, n_rows),
+        'physical_activity_level': rng.integers(30, 90, n_rows),
+        'stress_level': rng.integers(3, 9, n_rows),
+        'bmi_category': rng.choice(['Normal', 'Overweight', 'Obese'], n_rows),
+        'blood_pressure': rng.choice(['120/80', '125/80', '130/85', '135/90', '140/95'], n_rows),
+        'heart_rate': rng.integers(65, 86, n_rows),
+        'daily_steps': rng.integers(3000, 10000, n_rows)
+    })
+    y = rng.integers(0, 3, n_rows)
+    return df, y
+
+def make_pipeline(classifier):
+    """Same preprocessing layout as create_pipeline() in src/train.py."""
+    return Pipeline(steps=[
+        ('preprocessor', ColumnTransformer(transformers=[
+            ('num', StandardScaler(), NUM_COLS),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), CAT_COLS)
+        ])),
+        ('classifier', classifier)
+    ])
+
+def time_ms(fn, repeats):
+    """Returns the per-call latencies of fn in milliseconds."""
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def peak_mb(fn):
+    """Returns the peak memory (MB) traced while fn runs; numpy allocations are included."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+
+def run_benchmark(repeats, n_estimators, batch_size, batch_repeats):
+    df, y = make_data(374)
+    row = df.head(1)
+    batch, _ = make_data(batch_size, seed=7)
+    fitted = {}
+    models = {
+        'logistic_regression': LogisticRegression(C=1.0, max_iter=1000),
+        'svm (linear)': SVC(C=1.0, kernel='linear'),
+        'random_forest': RandomForestClassifier(n_estimators=n_estimators)
+    }
+
+    print(f"⏳ Single-row latency over {repeats} calls (median / p95, ms)")
+    for name, classifier in models.items():
+        pipeline = make_pipeline(classifier).fit(df, y)
+        explainer = build_explainer(pipeline)
+        fitted[name] = (pipeline, explainer)
+
+        # Warm up both paths before timing
+        pipeline.predict(row)
+        explainer.predict_and_explain(row)
+
+        predict = time_ms(lambda: pipeline.predict(row), repeats)
+        explain = time_ms(lambda: explainer.predict_and_explain(row), repeats)
+        added = np.median(explain) - np.median(predict)
+        print(
+            f"   - {name:<20} predict {np.median(predict):.3f} / {np.percentile(predict, 95):.3f}   "
+            f"predict+explain {np.median(explain):.3f} / {np.percentile(explain, 95):.3f}   "
+            f"added {added:+.3f}"
+        )
+
+    print(f"⏳ {batch_size}-row batch over {batch_repeats} calls (median ms, peak MB)")
+    for name, (pipeline, explainer) in fitted.items():
+        predict = time_ms(lambda: pipeline.predict(batch), batch_repeats)
+        explain = time_ms(lambda: explainer.predict_and_explain(batch), batch_repeats)
+        print(
+            f"   - {name:<20} predict {np.median(predict):.1f} ms / {peak_mb(lambda: pipeline.predict(batch)):.1f} MB   "
+            f"predict+explain {np.median(explain):.1f} ms / {peak_mb(lambda: explainer.predict_and_explain(batch)):.1f} MB"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark attribution latency and memory per row and per batch")
+    parser.add_argument('--repeats', type=int, default=500)
+    parser.add_argument('--n_estimators', type=int, default=100)
+    parser.add_argument('--batch_size', type=int, default=10000)
+    parser.add_argument('--batch_repeats', type=int, default=10)
+    args = parser.parse_args()
+    run_benchmark(args.repeats, args.n_estimators, args.batch_size, args.batch_repeats)
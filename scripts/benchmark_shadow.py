@@ -0,0 +1,121 @@
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+# Reuse the synthetic data and pipeline layout of the explanation benchmark
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from benchmark_explanations import make_data, make_pipeline
+
+# --- Configuration area ---
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+LABELS = np.array(['Insomnia', 'None', 'Sleep Apnea'])
+
+def save_model(model_dir, n_estimators, seed):
+    """Trains a random forest pipeline and saves it the way src/train.py does."""
+    df, y = make_data(374, seed=seed)
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(LABELS[y])
+    pipeline = make_pipeline(RandomForestClassifier(n_estimators=n_estimators, random_state=seed))
+    pipeline.fit(df, y_encoded)
+    joblib.dump(pipeline, os.path.join(model_dir, "model.joblib"))
+    joblib.dump(le, os.path.join(model_dir, "label_encoder.joblib"))
+    return df
+
+def wait_for_ping(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/ping")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not become healthy")
+
+def measure(port, rows, repeats, interval=0.0):
+    """
+    Sends single-record JSON requests sequentially over one keep-alive connection,
+    pausing `interval` seconds between requests (0 saturates the server).
+    """
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Content-Type": "application/json"}
+    latencies = []
+    for i in range(repeats):
+        body = json.dumps(rows[i % len(rows)])
+        start = time.perf_counter()
+        conn.request("POST", "/invocations", body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status != 200:
+            raise RuntimeError(f"Request failed with status {response.status}")
+        if interval:
+            time.sleep(interval)
+    return np.array(latencies)
+
+def shadow_stats(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("GET", "/shadow")
+    response = conn.getresponse()
+    return json.loads(response.read()) if response.status == 200 else None
+
+def run_mode(name, env, port, rows, repeats, warmup, interval):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_ping(port)
+        measure(port, rows, warmup)
+        latencies = measure(port, rows, repeats, interval)
+        if env.get("SHADOW_MODEL_DIR"):
+            # Let the scorer drain so the reported counts cover the whole run
+            time.sleep(1)
+        stats = shadow_stats(port)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"   - {name:<12} p50 {np.median(latencies):.3f} ms   p95 {np.percentile(latencies, 95):.3f} ms")
+    if stats:
+        print(f"     shadow: scored={stats['scored']} dropped={stats['dropped']} "
+              f"agreement={stats['agreement_rate']}")
+    return latencies
+
+def run_benchmark(repeats, warmup, n_estimators, port, interval):
+    with tempfile.TemporaryDirectory() as primary_dir, tempfile.TemporaryDirectory() as candidate_dir:
+        df = save_model(primary_dir, n_estimators, seed=42)
+        save_model(candidate_dir, n_estimators, seed=7)
+        rows = json.loads(df.head(50).to_json(orient="records"))
+
+        print(f"⏳ Primary /invocations latency over {repeats} sequential requests "
+              f"(random_forest, {n_estimators} trees, {interval * 1000:.0f} ms between requests)")
+        base_env = {"MODEL_DIR": primary_dir, "SHADOW_MODEL_DIR": ""}
+        off = run_mode("shadow off", base_env, port, rows, repeats, warmup, interval)
+        on = run_mode("shadow 1.0", {**base_env, "SHADOW_MODEL_DIR": candidate_dir,
+                                     "SHADOW_SAMPLE_RATE": "1.0"}, port, rows, repeats, warmup, interval)
+        print(f"   added: p50 {np.median(on) - np.median(off):+.3f} ms   "
+              f"p95 {np.percentile(on, 95) - np.percentile(off, 95):+.3f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark primary latency with shadow scoring off vs on")
+    parser.add_argument('--repeats', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--n_estimators', type=int, default=100)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--interval', type=float, default=0.0, help="Seconds between requests")
+    args = parser.parse_args()
+    run_benchmark(args.repeats, args.warmup, args.n_estimators, args.port, args.interval)
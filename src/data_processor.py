@@ -3,8 +3,12 @@ Data processing module for sleep disorder prediction.
 Handles data loading and cleaning/preprocessing.
 """
 import os
+import numpy as np
 import pandas as pd
 
+# Text columns whose distinct-value ratio is at or below this become 'category' in compact mode
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
 def load_data(file_path):
     """
     Reads CSV data.
@@ -21,17 +25,56 @@ def load_data(file_path):
         # Use 'from e' to preserve the original traceback, using RuntimeError instead of generic Exception
         raise RuntimeError(f"An error occurred while reading the file: {e}") from e
 
-def clean_data(df):
+def _memory_mb(df):
+    """
+    Returns the deep memory footprint of a DataFrame in megabytes.
+    """
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+def compact_dtypes(df, exclude=None):
+    """
+    Shrinks the in-memory representation of a cleaned DataFrame without changing its values:
+    1. Low-cardinality text columns become 'category'.
+    2. Integer columns are downcast to the smallest width that holds their range.
+    3. Float columns are downcast to float32 only when the round trip is exact.
+    Columns listed in `exclude` (e.g. the target) keep their dtype.
+    """
+    exclude = set(exclude or [])
+    for col in df.select_dtypes(include=['object', 'string']).columns.difference(exclude, sort=False):
+        n_unique = df[col].nunique(dropna=False)
+        if len(df) and n_unique / len(df) <= CATEGORY_MAX_UNIQUE_RATIO:
+            df[col] = df[col].astype('category')
+
+    for col in df.select_dtypes(include=['integer']).columns.difference(exclude, sort=False):
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    for col in df.select_dtypes(include=['floating']).columns.difference(exclude, sort=False):
+        downcast = df[col].astype(np.float32)
+        # float32 cannot hold most decimals exactly (e.g. 6.1), so only keep lossless conversions
+        if np.array_equal(downcast.to_numpy(dtype=np.float64), df[col].to_numpy(), equal_nan=True):
+            df[col] = downcast
+
+    return df
+
+def clean_data(df, compact=False, compact_exclude=None):
     """
     Data cleaning logic:
     1. Standardize column names: convert to lowercase, replace spaces with underscores.
     2. Missing value imputation.
     3. Handle inconsistencies in 'BMI Category'.
+    4. (Optional) Compact dtypes: category text columns and downcast numerics,
+       except for the (standardized) column names in compact_exclude.
     """
     if df is None:
         return None
 
-    df_clean = df.copy()
+    if compact:
+        mem_before = _memory_mb(df)
+        # Shallow copy: columns are only rebuilt when a later step changes them (step 2 only
+        # imputes columns that have gaps), so untouched columns keep sharing the input's memory
+        df_clean = df.copy(deep=False)
+    else:
+        df_clean = df.copy()
 
     # 1. Column name standardization
     df_clean.columns = [
@@ -43,6 +86,10 @@ def clean_data(df):
     # --- 2. Missing Value Imputation ---
     numerical_cols = df_clean.select_dtypes(include=['number']).columns
     categorical_cols = df_clean.select_dtypes(include=['object']).columns
+    if compact:
+        # Filling a column without gaps would only copy it
+        numerical_cols = numerical_cols[df_clean[numerical_cols].isna().any().to_numpy()]
+        categorical_cols = categorical_cols[df_clean[categorical_cols].isna().any().to_numpy()]
 
     print(f"--- DEBUG: Imputing {len(numerical_cols)} numerical features (Median) ---")
     df_clean[numerical_cols] = df_clean[numerical_cols].fillna(
@@ -57,5 +104,11 @@ def clean_data(df):
         df_clean['bmi_category'] = df_clean['bmi_category'].replace('Normal Weight', 'Normal')
         print("--- DEBUG: BMI categories normalized. ---")
 
+    # --- 4. Compact dtypes ---
+    if compact:
+        df_clean = compact_dtypes(df_clean, exclude=compact_exclude)
+        mem_after = _memory_mb(df_clean)
+        print(f"--- INFO: Compact dtypes: memory {mem_before:.3f} MB -> {mem_after:.3f} MB ---")
+
     print(f"--- INFO: Data cleaning completed. Final shape: {df_clean.shape} ---")
     return df_clean
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Sliced evaluation module for sleep disorder prediction.
+Computes accuracy and per-class precision/recall for demographic slices of the test set
+in a single groupby pass, so every training job produces its own bias audit.
+"""
+import numpy as np
+import pandas as pd
+
+# Demographic columns audited by default (age is bucketed, see AGE_BINS)
+DEFAULT_SLICE_COLUMNS = ['gender', 'occupation', 'bmi_category', 'age']
+
+# Age buckets: [0, 30), [30, 40), [40, 50), [50, 60), [60, inf)
+AGE_BINS = [0, 30, 40, 50, 60, np.inf]
+AGE_LABELS = ['<30', '30-39', '40-49', '50-59', '60+']
+
+def _slice_keys(X, slice_cols):
+    """
+    Builds one string key column per slice; 'age' is mapped to its bucket label.
+    """
+    keys = {}
+    for col in slice_cols:
+        if col not in X.columns:
+            print(f"--- WARNING: Slice column '{col}' not found, skipping. ---")
+            continue
+        if col == 'age':
+            keys['age_bucket'] = pd.cut(X[col], bins=AGE_BINS, labels=AGE_LABELS, right=False).astype(str)
+        else:
+            keys[col] = X[col].astype(str)
+    return pd.DataFrame(keys, index=X.index)
+
+def _metrics_from_counts(counts, class_names):
+    """
+    Converts summed indicator counts into accuracy and per-class precision/recall.
+    Precision/recall are None when their denominator is zero in a slice.
+    """
+    def ratio(num, den):
+        return float(num / den) if den else None
+
+    per_class = {}
+    for i, name in enumerate(class_names):
+        per_class[name] = {
+            'precision': ratio(counts[f'tp_{i}'], counts[f'pred_{i}']),
+            'recall': ratio(counts[f'tp_{i}'], counts[f'true_{i}']),
+            'support': int(counts[f'true_{i}'])
+        }
+    return {
+        'n': int(counts['n']),
+        'accuracy': ratio(counts['correct'], counts['n']),
+        'per_class': per_class
+    }
+
+def sliced_metrics(X, y_true, y_pred, class_names, slice_cols=None):
+    """
+    Computes overall and per-slice metrics.
+    1. Encode correctness and per-class TP / true / predicted indicators once per row.
+    2. Melt the slice keys to long form (slice, group) and sum all indicators in one groupby.
+    3. Derive accuracy and per-class precision/recall from the summed counts.
+
+    `y_true` / `y_pred` are label-encoded integers indexing into `class_names`.
+    Returns {"overall": {...}, "slices": {slice: {group: {...}}}}.
+    """
+    slice_cols = DEFAULT_SLICE_COLUMNS if slice_cols is None else slice_cols
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+
+    # 1. Row-level indicators
+    indicators = {'n': np.ones(len(y_true), dtype=np.int64), 'correct': (y_true == y_pred).astype(np.int64)}
+    for i in range(len(class_names)):
+        indicators[f'tp_{i}'] = ((y_true == i) & (y_pred == i)).astype(np.int64)
+        indicators[f'true_{i}'] = (y_true == i).astype(np.int64)
+        indicators[f'pred_{i}'] = (y_pred == i).astype(np.int64)
+    counts_df = pd.DataFrame(indicators, index=X.index)
+
+    overall = _metrics_from_counts(counts_df.sum(), class_names)
+
+    # 2. One groupby over every (slice, group) pair
+    keys = _slice_keys(X, slice_cols)
+    if keys.empty:
+        return {'overall': overall, 'slices': {}}
+
+    long_df = keys.join(counts_df).melt(
+        id_vars=list(counts_df.columns), var_name='slice', value_name='group'
+    )
+    grouped = long_df.groupby(['slice', 'group'], sort=True).sum()
+
+    # 3. Metrics per group
+    slices = {}
+    for (slice_name, group), counts in grouped.iterrows():
+        slices.setdefault(slice_name, {})[group] = _metrics_from_counts(counts, class_names)
+
+    return {'overall': overall, 'slices': slices}
+
+def flatten_metrics(metrics):
+    """
+    Flattens sliced metrics into {"slice/<slice>/<group>/<metric>": value} for W&B logging.
+    """
+    flat = {}
+    for slice_name, groups in metrics['slices'].items():
+        for group, m in groups.items():
+            prefix = f"slice/{slice_name}/{group}"
+            flat[f"{prefix}/n"] = m['n']
+            flat[f"{prefix}/accuracy"] = m['accuracy']
+            for class_name, c in m['per_class'].items():
+                flat[f"{prefix}/{class_name}/precision"] = c['precision']
+                flat[f"{prefix}/{class_name}/recall"] = c['recall']
+    # W&B rejects None values, so drop undefined ratios
+    return {k: v for k, v in flat.items() if v is not None}
@@ -108,6 +108,7 @@ def perform_training(args):
     
     # Imports must be inside the function to run AFTER install_dependencies
     import joblib
+    import json
     import pandas as pd
     import matplotlib.pyplot as plt
     from sklearn.model_selection import train_test_split
@@ -135,6 +136,11 @@ def perform_training(args):
         print("✅ [IMPORT] src.data_processor loaded.", flush=True)
     except ImportError as e:
         print(f"❌ [IMPORT] Failed to import src.data_processor: {e}", flush=True)
+    try:
+        from src.evaluation import sliced_metrics, flatten_metrics
+        print("✅ [IMPORT] src.evaluation loaded.", flush=True)
+    except ImportError as e:
+        print(f"❌ [IMPORT] Failed to import src.evaluation: {e}", flush=True)
     
     # --------------------------------------------------------
     # Helper Functions (Internal Definitions)
@@ -209,12 +215,14 @@ def perform_training(args):
             print(f"   Directory {data_dir} does not exist!", flush=True)
         raise FileNotFoundError(f"Data file missing: {file_path}")
 
+    target_col = 'sleep_disorder'
     df = load_data(file_path)
-    df = clean_data(df)
+    compact = str(args.compact_dtypes).strip().replace('"', '').lower() in ('true', '1', 'yes')
+    # The target stays a plain column: a categorical one rejects the 'None' fill below
+    df = clean_data(df, compact=compact, compact_exclude=[target_col])
     print(f"DATA_DIAG: Data Loaded. Shape: {df.shape}", flush=True)
 
     # Feature Engineering
-    target_col = 'sleep_disorder'
     if target_col not in df.columns:
         raise ValueError(f"Target {target_col} missing.")
 
@@ -227,7 +235,7 @@ def perform_training(args):
     
     # Training
     print("\n--- 2. Training ---", flush=True)
-    cat_features = X.select_dtypes(include=['object']).columns
+    cat_features = X.select_dtypes(include=['object', 'category']).columns
     num_features = X.select_dtypes(include=['number']).columns
     
     pipeline = create_pipeline(cat_features, num_features, args)
@@ -238,7 +246,8 @@ def perform_training(args):
 
     # Evaluation and Saving
     print("\n--- 3. Evaluation & Saving ---", flush=True)
-    acc = accuracy_score(y_test, pipeline.predict(X_test))
+    y_pred = pipeline.predict(X_test)
+    acc = accuracy_score(y_test, y_pred)
     
     # [W&B ADDITION] Log Metrics
     if wandb_available:
@@ -254,10 +263,36 @@ def perform_training(args):
     # Saving
     if not os.path.exists(args.model_dir):
         os.makedirs(args.model_dir)
-        
+
     joblib.dump(pipeline, os.path.join(args.model_dir, "model.joblib"))
     joblib.dump(le, os.path.join(args.model_dir, "label_encoder.joblib"))
     print(f"✅ FINAL: Model saved to {args.model_dir}", flush=True)
+
+    # Sliced Evaluation (bias audit per demographic group)
+    # Runs after the model is saved so an audit failure can never cost the artifact
+    print("\n--- 4. Sliced Evaluation ---", flush=True)
+    try:
+        class_names = [str(c) for c in le.classes_]
+        slice_report = sliced_metrics(X_test, y_test, y_pred, class_names)
+        for slice_name, groups in slice_report['slices'].items():
+            for group, m in groups.items():
+                print(f"SLICE: {slice_name}={group} n={m['n']} accuracy={m['accuracy']:.4f}", flush=True)
+
+        slice_path = os.path.join(args.model_dir, "sliced_metrics.json")
+        with open(slice_path, "w", encoding='utf-8') as f:
+            json.dump(slice_report, f, indent=2)
+        print(f"✅ Sliced metrics saved to {slice_path}", flush=True)
+    except Exception as e:
+        slice_report = None
+        print(f"⚠️ Sliced evaluation failed (model already saved): {e}", flush=True)
+
+    # [W&B ADDITION] Log Sliced Metrics
+    if wandb_available and slice_report is not None:
+        try:
+            wandb.log(flatten_metrics(slice_report))
+            print("✅ [W&B] Logged sliced metrics.", flush=True)
+        except Exception as e:
+            print(f"⚠️ [W&B] Sliced metrics logging failed: {e}", flush=True)
     
     # [W&B ADDITION] Finish Run
     if wandb_available:
@@ -285,6 +320,8 @@ if __name__ == '__main__':
         parser.add_argument('--n_estimators', type=int, default=100)
         parser.add_argument('--C', type=float, default=1.0)
         parser.add_argument('--kernel', type=str, default='rbf')
+        # Opt-in: category/downcast dtypes in clean_data to cut memory (string for SageMaker hyperparameters)
+        parser.add_argument('--compact_dtypes', type=str, default='false')
         
         # Robust Path Handling
         env_sm_channel = os.environ.get('SM_CHANNEL_TRAINING')
@@ -0,0 +1,204 @@
+"""
+Tests for the /invocations endpoint: JSON default plus Arrow IPC / MessagePack batches.
+"""
+import sys
+import os
+import io
+import pytest
+import pandas as pd
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pa = pytest.importorskip("pyarrow")
+msgpack = pytest.importorskip("msgpack")
+
+from fastapi.testclient import TestClient
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import api.app as app_module
+from api.formats import ARROW, MSGPACK
+from api.explain import build_explainer
+
+SAMPLE = {
+    "gender": "Male",
+    "age": 32,
+    "occupation": "Software Engineer",
+    "sleep_duration": 7.5,
+    "quality_of_sleep": 8,
+    "physical_activity_level": 60,
+    "stress_level": 5,
+    "bmi_category": "Normal",
+    "blood_pressure": "120/80",
+    "heart_rate": 70,
+    "daily_steps": 4000
+}
+
+@pytest.fixture
+def client():
+    """Serves a tiny pipeline trained on SleepInput-shaped data instead of the shipped artifact."""
+    df = pd.DataFrame([
+        {**SAMPLE, "stress_level": 3, "bmi_category": "Normal"},
+        {**SAMPLE, "stress_level": 8, "bmi_category": "Obese"},
+        {**SAMPLE, "stress_level": 4, "bmi_category": "Normal"},
+        {**SAMPLE, "stress_level": 9, "bmi_category": "Obese"},
+    ])
+    le = LabelEncoder()
+    y = le.fit_transform(["None", "Sleep Apnea", "None", "Sleep Apnea"])
+    cat_cols = ["gender", "occupation", "bmi_category", "blood_pressure"]
+    num_cols = [c for c in df.columns if c not in cat_cols]
+    pipeline = Pipeline(steps=[
+        ('preprocessor', ColumnTransformer(transformers=[
+            ('num', StandardScaler(), num_cols),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), cat_cols)
+        ])),
+        ('classifier', LogisticRegression())
+    ])
+    pipeline.fit(df, y)
+
+    original = (app_module.model_pipeline, app_module.label_encoder, app_module.explainer)
+    app_module.model_pipeline, app_module.label_encoder = pipeline, le
+    app_module.explainer = build_explainer(pipeline)
+    yield TestClient(app_module.app)
+    app_module.model_pipeline, app_module.label_encoder, app_module.explainer = original
+
+def _batch(n=3):
+    """Column-wise batch of n copies of SAMPLE with varying stress levels."""
+    columns = {name: [value] * n for name, value in SAMPLE.items()}
+    columns["stress_level"] = [3, 9, 5][:n]
+    columns["bmi_category"] = ["Normal", "Obese", "Normal"][:n]
+    return columns
+
+def _arrow_body(columns):
+    """Serializes columns as an Arrow IPC stream."""
+    table = pa.table(columns)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def test_json_default_unchanged(client):
+    """Test that the JSON single-record contract used by the frontend still works"""
+    response = client.post("/invocations", json=SAMPLE)
+    assert response.status_code == 200
+    assert response.json()["prediction"] in ("None", "Sleep Apnea")
+
+def test_json_validation_error(client):
+    """Test that an invalid JSON record is rejected with 422"""
+    response = client.post("/invocations", json={**SAMPLE, "age": "not a number"})
+    assert response.status_code == 422
+    # Same structured detail FastAPI produces for a typed body parameter
+    detail = response.json()["detail"]
+    assert detail[0]["loc"] == ["body", "age"]
+    assert detail[0]["type"] == "int_parsing"
+
+def test_arrow_batch_round_trip(client):
+    """Test that an Arrow IPC batch is scored and returned as an Arrow 'prediction' column"""
+    # Arrange
+    body = _arrow_body(_batch())
+
+    # Act
+    response = client.post("/invocations", content=body, headers={"Content-Type": ARROW})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(ARROW)
+    result = pa.ipc.open_stream(response.content).read_all()
+    expected = [client.post("/invocations", json=row).json()["prediction"]
+                for row in pd.DataFrame(_batch()).to_dict(orient="records")]
+    assert result.column("prediction").to_pylist() == expected
+
+def test_msgpack_batch_round_trip(client):
+    """Test that a MessagePack map of columns is scored and returned as MessagePack"""
+    body = msgpack.packb(_batch(2), use_bin_type=True)
+    response = client.post("/invocations", content=body, headers={"Content-Type": MSGPACK})
+
+    assert response.status_code == 200
+    assert len(msgpack.unpackb(response.content, raw=False)["prediction"]) == 2
+
+def test_binary_schema_errors(client):
+    """Test that missing, mistyped, null and ragged columns and truncated bodies are rejected with 422"""
+    missing = {k: v for k, v in _batch().items() if k != "age"}
+    mistyped = {**_batch(), "age": ["32", "33", "34"]}
+    with_null = {**_batch(), "gender": ["Male", None, "Female"]}
+    ragged = {**_batch(), "age": [30, 31]}
+
+    overflow = {**_batch(), "age": [2 ** 63 + 5, 33, 34]}
+
+    for columns in (missing, mistyped, with_null, ragged, overflow):
+        body = msgpack.packb(columns, use_bin_type=True)
+        response = client.post("/invocations", content=body, headers={"Content-Type": MSGPACK})
+        assert response.status_code == 422
+
+    empty = msgpack.packb({name: [] for name in SAMPLE}, use_bin_type=True)
+    response = client.post("/invocations", content=empty, headers={"Content-Type": MSGPACK})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Batch contains no rows"
+
+    body = _arrow_body({**_batch(), "heart_rate": pa.array([70.5, 71.0, 72.0])})
+    response = client.post("/invocations", content=body, headers={"Content-Type": ARROW})
+    assert response.status_code == 422
+
+    # Header parses, record batch is cut off
+    truncated = _arrow_body(_batch())
+    response = client.post("/invocations", content=truncated[:len(truncated) // 2], headers={"Content-Type": ARROW})
+    assert response.status_code == 422
+
+def test_shadow_endpoint(client):
+    """Test that /shadow is 404 when disabled and reports agreement once a candidate is attached"""
+    from api.shadow import ShadowScorer
+
+    assert client.get("/shadow").status_code == 404
+
+    # The primary model doubles as the candidate, so agreement must be perfect
+    scorer = ShadowScorer(app_module.model_pipeline, app_module.label_encoder, sample_rate=1.0)
+    scorer.start()
+    app_module.shadow_scorer = scorer
+    try:
+        assert client.post("/invocations", json=SAMPLE).status_code == 200
+        scorer.wait_idle()
+        stats = client.get("/shadow").json()
+    finally:
+        app_module.shadow_scorer = None
+        scorer.stop()
+
+    assert stats["scored"] == 1
+    assert stats["agreement_rate"] == 1.0
+
+def test_json_explanation(client):
+    """Test that ?explain=true adds per-field attributions without changing the prediction"""
+    plain = client.post("/invocations", json=SAMPLE).json()
+    explained = client.post("/invocations?explain=true", json=SAMPLE).json()
+
+    assert explained["prediction"] == plain["prediction"]
+    assert explained["explanation"]["method"] == "linear"
+    assert set(explained["explanation"]["attributions"]) == set(SAMPLE)
+
+def test_msgpack_explanation_columns(client):
+    """Test that binary batches get base_value and attribution_<field> columns"""
+    body = msgpack.packb(_batch(2), use_bin_type=True)
+    response = client.post("/invocations?explain=true", content=body, headers={"Content-Type": MSGPACK})
+    result = msgpack.unpackb(response.content, raw=False)
+
+    assert len(result["base_value"]) == 2
+    assert len(result["attribution_stress_level"]) == 2
+
+def test_explanation_without_fast_path(client, monkeypatch):
+    """Test that models without an explainer return nulls in every format instead of omitting them"""
+    monkeypatch.setattr(app_module, "explainer", None)
+
+    assert client.post("/invocations?explain=true", json=SAMPLE).json()["explanation"] is None
+
+    body = msgpack.packb(_batch(2), use_bin_type=True)
+    response = client.post("/invocations?explain=true", content=body, headers={"Content-Type": MSGPACK})
+    result = msgpack.unpackb(response.content, raw=False)
+    assert result["base_value"] == [None, None]
+    assert result["attribution_age"] == [None, None]
+
+    body = _arrow_body(_batch(2))
+    response = client.post("/invocations?explain=true", content=body, headers={"Content-Type": ARROW})
+    result = pa.ipc.open_stream(response.content).read_all()
+    assert result.column("attribution_age").null_count == 2
@@ -1,5 +1,6 @@
 # tests/test_data.py
 
+import numpy as np
 import pandas as pd
 import sys
 import os
@@ -78,4 +79,80 @@ def test_handles_empty_input():
     
     # Assert
     assert result_none is None
-    assert result_empty.shape == (0, 0)
\ No newline at end of file
+    assert result_empty.shape == (0, 0)
+
+def _mock_sleep_data():
+    """Small frame shaped like the raw Kaggle CSV."""
+    return pd.DataFrame({
+        'Person ID': range(20),
+        'Gender': ['Male', 'Female'] * 10,
+        'Age': list(range(30, 50)),
+        'Occupation': ['Engineer', 'Nurse', 'Doctor', 'Teacher'] * 5,
+        'Sleep Duration': [6.1, 7.5, 8.0, 5.9] * 5,
+        'Stress Level': [3, 5, 7, 8] * 5,
+        'BMI Category': ['Normal', 'Normal Weight', 'Obese', 'Overweight'] * 5,
+        'Daily Steps': [4000, 5000, 8000, 10000] * 5,
+        'Sleep Disorder': ['None', 'Insomnia', 'Sleep Apnea', None] * 5
+    })
+
+def test_compact_dtypes_shrink_without_changing_values():
+    """Test that compact mode uses smaller dtypes but keeps every value identical"""
+    # Arrange
+    raw = _mock_sleep_data()
+
+    # Act
+    default_df = clean_data(raw)
+    compact_df = clean_data(raw, compact=True)
+
+    # Assert
+    assert isinstance(compact_df['gender'].dtype, pd.CategoricalDtype)
+    assert isinstance(compact_df['bmi_category'].dtype, pd.CategoricalDtype)
+    assert compact_df['stress_level'].dtype == 'int8'
+    assert compact_df['daily_steps'].dtype == 'int16'
+    # 6.1 / 5.9 are not exact in float32, so the column must stay float64
+    assert compact_df['sleep_duration'].dtype == 'float64'
+    assert compact_df.memory_usage(deep=True).sum() < default_df.memory_usage(deep=True).sum()
+    pd.testing.assert_frame_equal(compact_df, default_df, check_dtype=False, check_categorical=False)
+
+def test_compact_does_not_mutate_input():
+    """Test that compact mode leaves the caller's frame untouched and shares unchanged columns"""
+    # Arrange
+    raw = _mock_sleep_data()
+    snapshot = raw.copy()
+
+    # Act
+    compact_df = clean_data(raw, compact=True)
+
+    # Assert
+    pd.testing.assert_frame_equal(raw, snapshot)
+    # Columns without gaps that stay float64 are shared with the input, not copied
+    assert np.shares_memory(compact_df['sleep_duration'].to_numpy(), raw['Sleep Duration'].to_numpy())
+
+def test_compact_trains_identical_predictions(tmp_path, monkeypatch):
+    """Test that perform_training with --compact_dtypes true saves a model predicting exactly like the default one"""
+    import joblib
+    from argparse import Namespace
+    from src.train import perform_training
+
+    # Arrange
+    monkeypatch.setenv("WANDB_MODE", "disabled")
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    _mock_sleep_data().to_csv(data_dir / "sleep_data.csv", index=False)
+
+    def train(compact_flag):
+        model_dir = tmp_path / f"model_{compact_flag}"
+        perform_training(Namespace(
+            model_type='logistic_regression', n_estimators=10, C=1.0, kernel='rbf',
+            compact_dtypes=compact_flag, train=str(data_dir), model_dir=str(model_dir)
+        ))
+        return joblib.load(model_dir / "model.joblib")
+
+    # Act
+    default_model = train('false')
+    compact_model = train('true')
+    X = clean_data(_mock_sleep_data()).drop(columns=['sleep_disorder', 'person_id'])
+
+    # Assert
+    assert list(default_model.predict(X)) == list(compact_model.predict(X))
+    assert (default_model.predict_proba(X) == compact_model.predict_proba(X)).all()
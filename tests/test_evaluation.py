@@ -0,0 +1,77 @@
+# tests/test_evaluation.py
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, precision_score, recall_score
+
+# Ensure modules in the src directory can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.evaluation import sliced_metrics, flatten_metrics
+
+CLASS_NAMES = ['Insomnia', 'None', 'Sleep Apnea']
+
+def _mock_predictions():
+    """Test-set features with label-encoded truth and predictions."""
+    rng = np.random.default_rng(0)
+    n = 60
+    X = pd.DataFrame({
+        'gender': rng.choice(['Male', 'Female'], n),
+        'occupation': rng.choice(['Nurse', 'Doctor', 'Engineer'], n),
+        'bmi_category': rng.choice(['Normal', 'Overweight'], n),
+        'age': rng.integers(25, 65, n)
+    }, index=rng.permutation(n))
+    y_true = rng.integers(0, 3, n)
+    y_pred = np.where(rng.random(n) < 0.7, y_true, rng.integers(0, 3, n))
+    return X, y_true, y_pred
+
+def test_slices_match_per_group_sklearn():
+    """Test that the one-pass groupby matches filtering each group and scoring it with sklearn"""
+    # Arrange
+    X, y_true, y_pred = _mock_predictions()
+
+    # Act
+    report = sliced_metrics(X, y_true, y_pred, CLASS_NAMES)
+
+    # Assert
+    assert report['overall']['accuracy'] == accuracy_score(y_true, y_pred)
+    for group, m in report['slices']['gender'].items():
+        mask = (X['gender'] == group).to_numpy()
+        assert m['n'] == mask.sum()
+        assert np.isclose(m['accuracy'], accuracy_score(y_true[mask], y_pred[mask]))
+        precision = precision_score(y_true[mask], y_pred[mask], labels=[0, 1, 2], average=None, zero_division=0)
+        recall = recall_score(y_true[mask], y_pred[mask], labels=[0, 1, 2], average=None, zero_division=0)
+        for i, name in enumerate(CLASS_NAMES):
+            assert np.isclose(m['per_class'][name]['precision'] or 0.0, precision[i])
+            assert np.isclose(m['per_class'][name]['recall'] or 0.0, recall[i])
+
+def test_age_buckets_and_missing_columns():
+    """Test that age is bucketed and absent slice columns are skipped"""
+    # Arrange
+    X, y_true, y_pred = _mock_predictions()
+
+    # Act
+    report = sliced_metrics(X, y_true, y_pred, CLASS_NAMES, slice_cols=['age', 'not_a_column'])
+
+    # Assert
+    assert set(report['slices']) == {'age_bucket'}
+    assert set(report['slices']['age_bucket']) <= {'<30', '30-39', '40-49', '50-59', '60+'}
+    assert sum(m['n'] for m in report['slices']['age_bucket'].values()) == len(X)
+
+def test_undefined_ratios_are_none_and_not_logged():
+    """Test that a class never predicted in a slice has precision None and is dropped for W&B"""
+    # Arrange: every prediction is class 1
+    X = pd.DataFrame({'gender': ['Male', 'Female', 'Male']})
+    y_true = np.array([0, 1, 2])
+    y_pred = np.array([1, 1, 1])
+
+    # Act
+    report = sliced_metrics(X, y_true, y_pred, CLASS_NAMES, slice_cols=['gender'])
+    flat = flatten_metrics(report)
+
+    # Assert
+    assert report['slices']['gender']['Male']['per_class']['Insomnia']['precision'] is None
+    assert 'slice/gender/Male/Insomnia/precision' not in flat
+    assert flat['slice/gender/Male/accuracy'] == 0.0
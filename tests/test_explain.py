@@ -0,0 +1,98 @@
+"""
+Tests for the fast attribution paths: attributions plus base value must reproduce the model's
+own score for the predicted class, and be reported per original SleepInput field.
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.svm import SVC
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.explain import build_explainer
+
+CAT_COLS = ['gender', 'occupation', 'bmi_category']
+NUM_COLS = ['age', 'sleep_duration', 'stress_level']
+
+def _fit(classifier, n_classes=3):
+    """Fits the train.py pipeline layout on random SleepInput-shaped data."""
+    rng = np.random.default_rng(0)
+    n = 150
+    df = pd.DataFrame({
+        'gender': rng.choice(['Male', 'Female'], n),
+        'occupation': rng.choice(['Nurse', 'Doctor', 'Engineer'], n),
+        'bmi_category': rng.choice(['Normal', 'Overweight', 'Obese'], n),
+        'age': rng.integers(25, 60, n),
+        'sleep_duration': rng.normal(7, 1, n),
+        'stress_level': rng.integers(1, 10, n)
+    })
+    y = rng.integers(0, n_classes, n)
+    pipeline = Pipeline(steps=[
+        ('preprocessor', ColumnTransformer(transformers=[
+            ('num', StandardScaler(), pd.Index(NUM_COLS)),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), pd.Index(CAT_COLS))
+        ])),
+        ('classifier', classifier)
+    ])
+    return pipeline.fit(df, y), df
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_linear_attributions_sum_to_decision_score(n_classes):
+    """Test that logistic regression attributions + bias equal the predicted class's decision score"""
+    pipeline, df = _fit(LogisticRegression(), n_classes)
+    explainer = build_explainer(pipeline)
+
+    pred, base, attributions = explainer.predict_and_explain(df)
+
+    scores = pipeline.decision_function(df)
+    if n_classes == 2:
+        expected = np.where(pred == 1, scores, -scores)
+    else:
+        expected = scores[np.arange(len(df)), pred]
+    assert explainer.method == "linear"
+    assert (pred == pipeline.predict(df)).all()
+    assert np.allclose(base + attributions.sum(axis=1), expected)
+
+def test_linear_svm_pairs_collected_per_class():
+    """Test that one-vs-one linear SVM attributions sum the pairwise margins of the predicted class"""
+    pipeline, df = _fit(SVC(kernel='linear', decision_function_shape='ovo'))
+    explainer = build_explainer(pipeline)
+
+    pred, base, attributions = explainer.predict_and_explain(df)
+
+    # Pairs (0,1), (0,2), (1,2): positive margins vote for the first class of the pair
+    ovo = pipeline.decision_function(df)
+    class_scores = np.stack([ovo[:, 0] + ovo[:, 1], -ovo[:, 0] + ovo[:, 2], -ovo[:, 1] - ovo[:, 2]], axis=1)
+    assert np.allclose(base + attributions.sum(axis=1), class_scores[np.arange(len(df)), pred])
+
+def test_tree_path_attributions_sum_to_probability():
+    """Test that random forest path contributions + bias equal the predicted class probability"""
+    pipeline, df = _fit(RandomForestClassifier(n_estimators=10, random_state=0))
+    explainer = build_explainer(pipeline)
+
+    pred, base, attributions = explainer.predict_and_explain(df)
+
+    proba = pipeline.predict_proba(df)[np.arange(len(df)), pred]
+    assert explainer.method == "tree_path"
+    assert np.allclose(base + attributions.sum(axis=1), proba)
+
+def test_attributions_map_to_input_fields():
+    """Test that one-hot outputs are folded back to their original field"""
+    pipeline, df = _fit(LogisticRegression())
+    explainer = build_explainer(pipeline)
+
+    _, _, attributions = explainer.predict_and_explain(df.head(1))
+
+    assert explainer.field_names == NUM_COLS + CAT_COLS
+    assert attributions.shape == (1, len(NUM_COLS + CAT_COLS))
+
+def test_no_fast_path_returns_none():
+    """Test that kernel SVMs have no fast path and are reported as unavailable"""
+    pipeline, _ = _fit(SVC(kernel='rbf'))
+    assert build_explainer(pipeline) is None
@@ -0,0 +1,211 @@
+"""
+Tests for the prefork serving helpers.
+"""
+import sys
+import os
+import asyncio
+import json
+import multiprocessing
+import signal
+import socket
+import subprocess
+import time
+import urllib.request
+import joblib
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+from api.serve import CountingApp, default_worker_count, read_memory_mb
+
+def test_default_worker_count(monkeypatch):
+    """Test that the worker count follows WEB_CONCURRENCY, otherwise the available CPUs"""
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert default_worker_count() == 3
+
+    monkeypatch.delenv("WEB_CONCURRENCY")
+    assert default_worker_count() >= 1
+
+def test_read_memory_mb_own_process():
+    """Test that memory is read from /proc where available (and degrades to None elsewhere)"""
+    memory = read_memory_mb(os.getpid())
+    if os.path.exists(f"/proc/{os.getpid()}/smaps_rollup"):
+        assert memory["rss"] > 0
+        assert memory["pss"] <= memory["rss"]
+    else:
+        assert memory == {"rss": None, "pss": None, "shared": None}
+
+def test_counting_app_counts_http_only():
+    """Test that only HTTP requests increment the worker's slot in the shared counters"""
+    calls = []
+
+    async def inner(scope, receive, send):
+        calls.append(scope["type"])
+
+    counters = multiprocessing.RawArray("q", 2)
+    app = CountingApp(inner, counters, slot=1)
+
+    async def drive():
+        await app({"type": "http"}, None, None)
+        await app({"type": "http"}, None, None)
+        await app({"type": "lifespan"}, None, None)
+
+    asyncio.run(drive())
+
+    assert list(counters) == [0, 2]
+    assert calls == ["http", "http", "lifespan"]
+
+def test_load_artifacts_skips_reload_when_preloaded(monkeypatch):
+    """Test that workers reuse the model preloaded in the parent instead of joblib.load-ing their own"""
+    pytest.importorskip("fastapi")
+    import api.app as app_module
+
+    calls = []
+    monkeypatch.setattr(app_module.joblib, "load", lambda *args, **kwargs: calls.append(args))
+    monkeypatch.setattr(app_module, "model_pipeline", object())
+    monkeypatch.setattr(app_module, "label_encoder", object())
+
+    app_module.load_artifacts()
+
+    assert calls == []
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _http(port, method, path, body=None):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}", data=body, method=method,
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+def _save_model(model_dir):
+    """Saves a tiny model the way src/train.py does and returns one request body."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+
+    sample = json.load(open(os.path.join(REPO_ROOT, "api", "request_schema.json")))
+    df = pd.DataFrame([{**sample, "stress_level": level} for level in range(1, 11)])
+    le = LabelEncoder()
+    y = le.fit_transform(["None", "Insomnia"] * 5)
+    cat_cols = ["gender", "occupation", "bmi_category", "blood_pressure"]
+    pipeline = Pipeline(steps=[
+        ('preprocessor', ColumnTransformer(transformers=[
+            ('num', StandardScaler(), [c for c in df.columns if c not in cat_cols]),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), cat_cols)
+        ])),
+        ('classifier', LogisticRegression())
+    ]).fit(df, y)
+    joblib.dump(pipeline, model_dir / "model.joblib")
+    joblib.dump(le, model_dir / "label_encoder.joblib")
+    return sample
+
+def _start_prefork(model_dir, port, workers=2):
+    """Starts api.serve with the model as both primary and shadow candidate and waits for /ping."""
+    env = {**os.environ, "MODEL_DIR": str(model_dir), "SHADOW_MODEL_DIR": str(model_dir),
+           "SHADOW_SAMPLE_RATE": "1.0"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "api.serve", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log_level", "warning"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            _http(port, "GET", "/ping")
+            return server
+        except OSError:
+            if time.monotonic() > deadline or server.poll() is not None:
+                server.kill()
+                raise
+            time.sleep(0.2)
+
+def _children(pid):
+    """Returns {child_pid: niceness} for the direct children of pid, read from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        # Fields after the command name: state, ppid, ..., nice is the 17th
+        if int(fields[1]) == pid:
+            children[int(entry)] = int(fields[16])
+    return children
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork mode requires os.fork")
+def test_prefork_smoke(tmp_path):
+    """Test that two forked workers serve predictions and share one shadow scorer"""
+    pytest.importorskip("uvicorn")
+    pytest.importorskip("fastapi")
+
+    # Arrange
+    sample = _save_model(tmp_path)
+    port = _free_port()
+    server = _start_prefork(tmp_path, port)
+    try:
+        # Act
+        predictions = [
+            _http(port, "POST", "/invocations", json.dumps(sample).encode())[1]["prediction"]
+            for _ in range(6)
+        ]
+        time.sleep(1)
+        _, stats = _http(port, "GET", "/shadow")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        output, _ = server.communicate(timeout=30)
+
+    # Assert
+    assert set(predictions) <= {"None", "Insomnia"}
+    # Requests spread over both workers land in the one shared scorer
+    assert stats["sampled"] == 6
+    assert stats["scored"] == 6
+    assert stats["agreement_rate"] == 1.0
+    assert output.count("Model and encoder loaded successfully") == 1
+    assert output.count("Model already loaded") == 2
+    assert "All workers stopped" in output
+    assert server.returncode == 0
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="finding child processes requires /proc")
+def test_prefork_respawns_workers_and_reports_scorer_exit(tmp_path):
+    """Test that a killed worker is respawned after a backoff and a killed scorer is logged, not reaped silently"""
+    pytest.importorskip("uvicorn")
+    pytest.importorskip("fastapi")
+
+    # Arrange: the scorer is the only child running at niceness 19
+    sample = _save_model(tmp_path)
+    port = _free_port()
+    server = _start_prefork(tmp_path, port)
+    try:
+        children = _children(server.pid)
+        scorer_pid = next(pid for pid, nice in children.items() if nice == 19)
+        worker_pid = next(pid for pid, nice in children.items() if nice != 19)
+
+        # Act
+        os.kill(worker_pid, signal.SIGKILL)
+        os.kill(scorer_pid, signal.SIGKILL)
+        time.sleep(2.5)
+        status, _ = _http(port, "POST", "/invocations", json.dumps(sample).encode())
+        _, stats = _http(port, "GET", "/shadow")
+        respawned = _children(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        output, _ = server.communicate(timeout=30)
+
+    # Assert
+    assert status == 200
+    assert len(respawned) == 2 and worker_pid not in respawned and scorer_pid not in respawned
+    assert "exited with code -9, respawning in 1s" in output
+    assert "Shadow scorer exited with code -9" in output
+    assert stats["scorer_alive"] is False
+    assert "All workers stopped" in output
+    assert server.returncode == 0
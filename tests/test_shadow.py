@@ -0,0 +1,161 @@
+"""
+Tests for shadow scoring of a candidate model.
+"""
+import sys
+import os
+import tarfile
+import tempfile
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.shadow import ShadowScorer, load_candidate
+
+class StubModel:
+    """Predicts a fixed encoded class."""
+    def __init__(self, encoded):
+        self.encoded = encoded
+
+    def predict(self, df):
+        return np.full(len(df), self.encoded)
+
+class StubEncoder:
+    classes_ = np.array(['Insomnia', 'None', 'Sleep Apnea'])
+
+    def inverse_transform(self, encoded):
+        return self.classes_[encoded]
+
+def test_agreement_rate_and_latency():
+    """Test that scored requests update agreement rate and latency percentiles"""
+    # Arrange: candidate always predicts 'None'
+    scorer = ShadowScorer(StubModel(1), StubEncoder(), sample_rate=1.0)
+    scorer.start()
+    df = pd.DataFrame({'age': [30, 40]})
+
+    # Act
+    scorer.submit(df, ['None', 'None'])
+    scorer.submit(df, ['None', 'Insomnia'])
+    scorer.wait_idle()
+    stats = scorer.stats()
+    scorer.stop()
+
+    # Assert
+    assert stats['sampled'] == 2
+    assert stats['scored'] == 4
+    assert stats['agreement_rate'] == 0.75
+    assert stats['latency_ms']['p50'] >= 0
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test that submit never blocks: with no scorer running, overflow is counted as dropped"""
+    # Arrange: queue holds one item and the scorer process is not started yet
+    scorer = ShadowScorer(StubModel(1), StubEncoder(), sample_rate=1.0, queue_size=1)
+    df = pd.DataFrame({'age': [30]})
+
+    # Act
+    for _ in range(5):
+        scorer.submit(df, ['None'])
+    stats = scorer.stats()
+    scorer.start()
+    scorer.wait_idle()
+    scorer.stop()
+
+    # Assert
+    assert stats['sampled'] == 1
+    assert stats['dropped'] == 4
+
+def test_only_owner_process_stops_scorer():
+    """Test that a forked prefork worker cannot stop the scorer it inherited"""
+    scorer = ShadowScorer(StubModel(1), StubEncoder(), sample_rate=1.0)
+    scorer.start()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            scorer.stop()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        assert scorer._process.is_alive()
+    finally:
+        scorer.stop()
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork workers require os.fork")
+def test_worker_slots_aggregate_without_locks():
+    """Test that forked workers count into their own slots and stats() sums them"""
+    # Arrange: two worker slots, the forked child takes slot 1
+    scorer = ShadowScorer(StubModel(1), StubEncoder(), sample_rate=1.0, n_slots=2)
+    scorer.start()
+    df = pd.DataFrame({'age': [30]})
+    try:
+        # Act
+        pid = os.fork()
+        if pid == 0:
+            scorer.use_slot(1)
+            for _ in range(3):
+                scorer.submit(df, ['None'])
+            # Let the queue's feeder thread flush before exiting without cleanup
+            scorer._queue.close()
+            scorer._queue.join_thread()
+            os._exit(0)
+        scorer.submit(df, ['Insomnia'])
+        os.waitpid(pid, 0)
+        assert scorer.wait_idle()
+        stats = scorer.stats()
+    finally:
+        scorer.stop()
+
+    # Assert
+    assert list(scorer._submit_counters) == [1, 0, 3, 0]
+    assert stats['sampled'] == 4
+    assert stats['scored'] == 4
+    assert stats['agreement_rate'] == 0.75
+    with pytest.raises(ValueError):
+        scorer.use_slot(2)
+
+def _write_model(model_dir):
+    joblib.dump(StubModel(1), os.path.join(model_dir, "model.joblib"))
+    joblib.dump(StubEncoder(), os.path.join(model_dir, "label_encoder.joblib"))
+
+def test_load_candidate_from_tarball(tmp_path, monkeypatch):
+    """Test that a model.tar.gz is extracted, loaded and its temporary directory removed"""
+    # Arrange
+    model_dir = tmp_path / "model"
+    model_dir.mkdir()
+    _write_model(str(model_dir))
+    archive = tmp_path / "model.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        for name in ("model.joblib", "label_encoder.joblib"):
+            tar.add(model_dir / name, arcname=name)
+    extract_root = tmp_path / "extract"
+    extract_root.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(extract_root))
+
+    # Act
+    model_pipeline, label_encoder = load_candidate(str(archive))
+
+    # Assert
+    assert model_pipeline.encoded == 1
+    assert list(label_encoder.classes_) == list(StubEncoder.classes_)
+    assert os.listdir(extract_root) == []
+
+def test_load_candidate_rejects_path_traversal(tmp_path):
+    """Test that archive members escaping the extraction directory are refused"""
+    # Arrange
+    payload = tmp_path / "evil.txt"
+    payload.write_text("x")
+    archive = tmp_path / "model.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(payload, arcname="../evil.txt")
+
+    # Act / Assert
+    with pytest.raises((tarfile.TarError, ValueError)):
+        load_candidate(str(archive))
+
+def test_zero_sample_rate_skips_all():
+    """Test that a zero sample rate never enqueues anything"""
+    scorer = ShadowScorer(StubModel(1), StubEncoder(), sample_rate=0.0)
+    scorer.submit(pd.DataFrame({'age': [30]}), ['None'])
+    stats = scorer.stats()
+
+    assert stats['sampled'] == 0
+    assert stats['agreement_rate'] is None